@@ -0,0 +1,343 @@
+# columnar.py
+
+###########################################################
+# Fixed-width columnar tables on disk
+# One .npy file per column plus a dictionary.json sidecar
+# holding the labels of dictionary-encoded string columns.
+# Columns are opened as numpy memmaps, so worker processes
+# share pages through the OS cache instead of copying.
+#
+# Every dimension generator writes its table to dims/<name>
+# next to the CSV; downstream stages open it with open_dim().
+###########################################################
+
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+DICTIONARY_FILE = "dictionary.json"
+DIM_DIR = "dims"
+
+# strings with at most this share of distinct values are stored as codes,
+# the rest (ids, titles) as fixed-width utf-8 bytes
+DICTIONARY_MAX_RATIO = 0.5
+
+# bool mask of null rows kept next to byte columns that contain nulls
+NULL_SUFFIX = ".null"
+
+# =========================================================
+# HELPERS
+# =========================================================
+
+
+def _code_dtype(n_labels):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_labels <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode(values):
+    """Dictionary-encode strings; nulls get code -1."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), list(values.cat.categories)
+    else:
+        codes, labels = pd.factorize(values, sort=True)
+        labels = list(labels)
+
+    return codes.astype(_code_dtype(len(labels))), labels
+
+
+def _column_array(values, factorize=True):
+    """
+    Return (fixed-width array, encoding, labels, null mask) for one column.
+
+    The null mask is only set for byte columns with nulls; the other
+    encodings carry nulls themselves (code -1, NaN, NaT). With
+    factorize=False only categoricals are dictionary-encoded.
+    """
+    if (
+        pd.api.types.is_bool_dtype(values)
+        or pd.api.types.is_numeric_dtype(values)
+        or pd.api.types.is_datetime64_any_dtype(values)
+    ):
+        return values.to_numpy(), "plain", None, None
+
+    present = values.dropna()
+    first = present.iloc[0] if len(present) else None
+
+    # python date / datetime objects
+    if isinstance(first, date):
+        unit = "us" if isinstance(first, datetime) else "D"
+        array = pd.to_datetime(values).to_numpy().astype(f"datetime64[{unit}]")
+        return array, "plain", None, None
+
+    if isinstance(values.dtype, pd.CategoricalDtype) or (
+        factorize and present.nunique() <= DICTIONARY_MAX_RATIO * len(present)
+    ):
+        codes, labels = _encode(values)
+        return codes, "dictionary", labels, None
+
+    is_null = values.isna().to_numpy()
+    encoded = values.fillna("").str.encode("utf-8")
+    width = max(1, int(encoded.str.len().max()))
+    array = np.array(encoded.tolist(), dtype=f"S{width}")
+    return array, "bytes", None, is_null if is_null.any() else None
+
+
+def _write_meta(directory, columns, n_rows, encodings, dictionary, nullable):
+    with open(os.path.join(directory, DICTIONARY_FILE), "w") as f:
+        json.dump(
+            {
+                "columns": columns,
+                "n_rows": n_rows,
+                "encodings": encodings,
+                "dictionary": dictionary,
+                "nullable": nullable,
+            },
+            f,
+            indent=2,
+        )
+
+
+# =========================================================
+# WRITE / OPEN
+# =========================================================
+
+
+def write_table(directory, df):
+    """
+    Write every column of df to directory/<column>.npy.
+
+    Low-cardinality strings are stored as compact integer codes with their
+    labels in the dictionary.json sidecar, other strings as fixed-width
+    utf-8 bytes (plus a <column>.null.npy mask if they contain nulls), dates
+    as datetime64 and numbers / flags as-is.
+    """
+    os.makedirs(directory, exist_ok=True)
+    encodings = {}
+    dictionary = {}
+    nullable = []
+
+    for name in df.columns:
+        array, encodings[name], labels, is_null = _column_array(df[name])
+
+        if labels is not None:
+            dictionary[name] = labels
+
+        if is_null is not None:
+            nullable.append(name)
+            np.save(os.path.join(directory, f"{name}{NULL_SUFFIX}.npy"), is_null)
+
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+    _write_meta(directory, list(df.columns), len(df), encodings, dictionary, nullable)
+
+
+class ColumnarWriter:
+    """
+    Write a table of known length batch by batch, in the write_table() layout.
+
+    Columns are preallocated with np.lib.format.open_memmap on the first
+    batch and filled one row slice per batch, so the table is never held in
+    memory as a whole. Only categoricals are dictionary-encoded (with the
+    same categories in every batch); other strings are stored as bytes of
+    the width given for them in string_widths, which is required so that a
+    later, wider batch cannot leave a half-written table behind.
+    """
+
+    def __init__(self, directory, n_rows, string_widths=None):
+        self.directory = directory
+        self.n_rows = n_rows
+        self.string_widths = string_widths or {}
+        self.offset = 0
+        self._arrays = None
+        self._nulls = {}
+        self._has_nulls = set()
+        self._encodings = {}
+        self._dictionary = {}
+
+    def _open(self, df):
+        dtypes = {}
+
+        # check every column before any file is created
+        for name in df.columns:
+            array, encoding, labels, _ = _column_array(df[name], factorize=False)
+            dtypes[name] = array.dtype
+
+            if encoding == "bytes":
+                if name not in self.string_widths:
+                    raise ValueError(f"string_widths has no width for column {name}")
+                dtypes[name] = np.dtype(f"S{self.string_widths[name]}")
+
+            self._encodings[name] = encoding
+            if labels is not None:
+                self._dictionary[name] = labels
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._columns = list(df.columns)
+        self._arrays = {}
+
+        for name, dtype in dtypes.items():
+            if self._encodings[name] == "bytes":
+                self._nulls[name] = np.lib.format.open_memmap(
+                    os.path.join(self.directory, f"{name}{NULL_SUFFIX}.npy"),
+                    mode="w+",
+                    dtype=bool,
+                    shape=(self.n_rows,),
+                )
+
+            self._arrays[name] = np.lib.format.open_memmap(
+                os.path.join(self.directory, f"{name}.npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=(self.n_rows,),
+            )
+
+    def write(self, df):
+        """Fill the next len(df) rows."""
+        if self._arrays is None:
+            self._open(df)
+
+        start, stop = self.offset, self.offset + len(df)
+        if stop > self.n_rows:
+            raise ValueError(f"more than {self.n_rows} rows written")
+
+        # check the whole batch before any row is written
+        batch = {}
+        for name in self._columns:
+            array, encoding, labels, is_null = _column_array(df[name], factorize=False)
+            target = self._arrays[name]
+
+            changed = encoding != self._encodings[name]
+            if changed or labels != self._dictionary.get(name):
+                raise ValueError(f"column {name} changed encoding between batches")
+            if encoding == "bytes" and array.dtype.itemsize > target.dtype.itemsize:
+                raise ValueError(f"column {name} is wider than {target.dtype}")
+
+            batch[name] = array, is_null
+
+        for name, (array, is_null) in batch.items():
+            self._arrays[name][start:stop] = array
+
+            if is_null is not None:
+                self._nulls[name][start:stop] = is_null
+                self._has_nulls.add(name)
+
+        self.offset = stop
+
+    def close(self):
+        if self.offset != self.n_rows:
+            raise ValueError(f"{self.offset} of {self.n_rows} rows written")
+
+        for array in self._arrays.values():
+            array.flush()
+
+        # keep null masks only for byte columns that had nulls
+        for name in list(self._nulls):
+            if name in self._has_nulls:
+                self._nulls[name].flush()
+            else:
+                del self._nulls[name]
+                os.remove(os.path.join(self.directory, f"{name}{NULL_SUFFIX}.npy"))
+
+        _write_meta(
+            self.directory,
+            self._columns,
+            self.n_rows,
+            self._encodings,
+            self._dictionary,
+            sorted(self._has_nulls),
+        )
+        self._arrays = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+
+
+def write_dim(name, df):
+    write_table(os.path.join(DIM_DIR, name), df)
+
+
+def open_dim(name):
+    return ColumnarTable(os.path.join(DIM_DIR, name))
+
+
+class ColumnarTable:
+    """
+    Read-only view of a table written by write_table().
+
+    table[column] is the memory-mapped array (codes or utf-8 bytes for
+    string columns), table.labels(column) the sidecar dictionary for a
+    code column, table.nulls(column) the null mask of a byte column and
+    table.column(column) the decoded values.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, DICTIONARY_FILE)) as f:
+            meta = json.load(f)
+
+        self.directory = directory
+        self.columns = meta["columns"]
+        self.n_rows = meta["n_rows"]
+        self.encodings = meta["encodings"]
+        self._dictionary = meta["dictionary"]
+        self._arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in self.columns
+        }
+        self._nulls = {
+            name: np.load(
+                os.path.join(directory, f"{name}{NULL_SUFFIX}.npy"), mmap_mode="r"
+            )
+            for name in meta["nullable"]
+        }
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, column):
+        return self._arrays[column]
+
+    def labels(self, column):
+        return self._dictionary[column]
+
+    def nulls(self, column):
+        """Null mask of a byte column, None if it has no nulls."""
+        return self._nulls.get(column)
+
+    def decode(self, column, codes):
+        """Map codes of a dictionary-encoded column back to labels."""
+        labels = np.array(self._dictionary[column] + [None], dtype=object)
+        return labels[codes]
+
+    def column(self, column):
+        """Decoded values: categorical, str (None for nulls) or the raw memmap."""
+        encoding = self.encodings[column]
+        array = self._arrays[column]
+
+        if encoding == "dictionary":
+            return pd.Categorical.from_codes(
+                np.asarray(array, dtype=np.int64), categories=self._dictionary[column]
+            )
+        if encoding == "bytes":
+            decoded = np.char.decode(array, "utf-8")
+            if column not in self._nulls:
+                return decoded
+            decoded = decoded.astype(object)
+            decoded[self._nulls[column]] = None
+            return decoded
+        return array
+
+    def to_frame(self, columns=None):
+        """Load columns (all by default) into a DataFrame, e.g. for validators."""
+        return pd.DataFrame(
+            {name: self.column(name) for name in columns or self.columns}
+        )
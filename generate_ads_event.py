@@ -7,18 +7,26 @@
 ###########################################################
 
 import random
+import numpy as np
 import pandas as pd
 from faker import Faker
 from datetime import datetime, timedelta
 
 from enums import (
-    DEVICE_TYPES,
-    OS_BY_DEVICE,
     PLACEMENTS,
-    GEO_HIERARCHY,
 )
 
+from columnar import open_dim, write_dim
+from sinks import open_warehouse
 from generate_ad_creative import generate_ad_creative
+from popularity import (
+    CAMPAIGN_ZIPF_EXPONENT,
+    AliasSampler,
+    user_activity_weights,
+    zipf_weights,
+)
+from traffic import TrafficModel
+from user_profiles import UserProfileStore
 
 # =========================================================
 # 1. STABLE RANDOMNESS (deterministic runs)
@@ -28,6 +36,7 @@ from generate_ad_creative import generate_ad_creative
 
 SEED = 51
 random.seed(SEED)
+rng = np.random.default_rng(SEED)
 
 fake = Faker()
 Faker.seed(SEED)
@@ -36,7 +45,6 @@ Faker.seed(SEED)
 # 3. GLOBAL PARAMETERS
 # =========================================================
 
-N_USERS = 10000
 DAYS = 30
 START_DATE = datetime(2026, 1, 1)
 
@@ -47,24 +55,14 @@ BASE_VIEW_TO_CONVERSION = 0.001  # 1 conversion per 1K impressions without a cli
 AVG_SESSIONS_PER_DAY = 1.3
 AVG_EVENTS_PER_SESSION = 4
 
+# hour-of-day / day-of-week curves and holiday spikes, see traffic.py
+traffic = TrafficModel(START_DATE, DAYS)
+
 # =========================================================
 # 4. HELPER FUNCTIONS
 # =========================================================
 
 
-def sample_geo():
-    country = random.choice(list(GEO_HIERARCHY.keys()))
-    region = random.choice(list(GEO_HIERARCHY[country].keys()))
-    city = random.choice(GEO_HIERARCHY[country][region])
-    return country, region, city
-
-
-def sample_device_os():
-    device = random.choice(DEVICE_TYPES)
-    os = random.choice(OS_BY_DEVICE[device])
-    return device, os
-
-
 def sample_placement():
     return random.choice(PLACEMENTS)
 
@@ -89,33 +87,66 @@ def view_duration_ms(event_type, placement):
 
 
 # =========================================================
-# 5. DATA GENERATION
+# 5. DIMENSIONS (device and geo come from the users stage)
+# =========================================================
+
+profiles = UserProfileStore()
+N_USERS = len(profiles)
+
+# power users: per-user multiplier on sessions per day, same as playback sessions
+USER_ACTIVITY = user_activity_weights(N_USERS, np.random.default_rng(SEED))
+
+# a few campaigns win most of the impressions
+CAMPAIGN_IDS = open_dim("campaigns").column("campaign_id").tolist()
+campaign_popularity = AliasSampler(
+    zipf_weights(len(CAMPAIGN_IDS), CAMPAIGN_ZIPF_EXPONENT, rng)
+)
+
+# =========================================================
+# 6. DATA GENERATION
 # =========================================================
 
 users = [f"user_{i}" for i in range(N_USERS)]
 events = []
 creatives = []
 
-for user_id in users:
-    # how many days the users stays active. Most users churn quickly;
-    # long-tail power users for a realistic retention curve
-    active_days = retention_days()
-    device_type, os = sample_device_os()
-    country, region, city = sample_geo()
-
-    for day in range(active_days):
-        session_count = max(1, int(random.gauss(AVG_SESSIONS_PER_DAY, 0.5)))
-
-        for _ in range(session_count):
+# batches go to the warehouse (if configured) while generation continues
+with open_warehouse(["fact_ad_event"]) as warehouse:
+    for user_num, user_id in enumerate(users):
+        # how many days the users stays active. Most users churn quickly;
+        # long-tail power users for a realistic retention curve
+        active_days = retention_days()
+        device_type, os, country, region, city = profiles.lookup(user_num)
+
+        # all active days of the user at once: session counts, then starts
+        avg_sessions = (
+            AVG_SESSIONS_PER_DAY
+            * USER_ACTIVITY[user_num]
+            * traffic.day_weights(country)[:active_days]
+        )
+        session_counts = np.maximum(1, rng.normal(avg_sessions, 0.5).astype(np.int64))
+        session_days = np.repeat(np.arange(active_days), session_counts)
+
+        session_starts = traffic.session_starts(
+            country, region, session_days, rng
+        ).tolist()
+
+        # campaigns for every impression of the user in one draw
+        events_per_session = np.maximum(
+            1,
+            rng.normal(AVG_EVENTS_PER_SESSION, 1, len(session_starts)).astype(np.int64),
+        )
+        campaigns = campaign_popularity.sample(events_per_session.sum(), rng)
+        session_campaigns = np.split(campaigns, np.cumsum(events_per_session)[:-1])
+
+        for session_start, session_campaign_idx in zip(
+            session_starts, session_campaigns
+        ):
             session_id = fake.uuid4()
-            session_start = START_DATE + timedelta(
-                days=day, minutes=random.randint(0, 1440)
-            )
 
             placement = sample_placement()
-            events_in_session = max(1, int(random.gauss(AVG_EVENTS_PER_SESSION, 1)))
 
-            for _ in range(events_in_session):
+            for campaign_idx in session_campaign_idx.tolist():
 
                 creative = generate_ad_creative()
                 creatives.append(creative)  # for creative dim table
@@ -136,7 +167,7 @@ for user_id in users:
                     "ad_id": creative["ad_id"],
                     "ad_format": creative["ad_format"],
                     "creative_type": creative["creative_type"],
-                    "campaign_id": f"camp_{random.randint(1, 20)}",
+                    "campaign_id": CAMPAIGN_IDS[campaign_idx],
                     "event_type": "impression",
                     "event_timestamp": event_ts,
                     "device_type": device_type,
@@ -219,6 +250,9 @@ for user_id in users:
 
                     events.append(conversion_event)
 
+        warehouse.stream("fact_ad_event", events)
+
+
 # =========================================================
 # WRITE OUTPUT
 # =========================================================
@@ -230,4 +264,5 @@ print(f"Generated {len(df):,} ad events")
 
 df_creatives = pd.DataFrame(creatives)
 df_creatives.to_csv("ad_creatives.csv", index=False)
+write_dim("creatives", df_creatives)
 print(f"Generated {len(df_creatives):,} ad creatives")
@@ -5,6 +5,9 @@ import pandas as pd
 from faker import Faker
 from datetime import datetime, timedelta
 
+from columnar import write_dim
+from sinks import open_warehouse
+
 # =========================================================
 # STABLE RANDOMNESS
 # =========================================================
@@ -81,5 +84,9 @@ for i in range(N_CAMPAIGNS):
 
 df = pd.DataFrame(campaigns)
 df.to_csv("campaigns.csv", index=False)
+write_dim("campaigns", df)
+
+with open_warehouse(["dim_campaign"]) as warehouse:
+    warehouse.write("dim_campaign", df)
 
 print(f"Generated {len(df):,} campaigns")
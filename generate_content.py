@@ -5,6 +5,8 @@ import pandas as pd
 from faker import Faker
 from datetime import datetime
 
+from columnar import write_dim
+from sinks import open_warehouse
 from enums import (
     GENRES,
 )
@@ -112,5 +114,9 @@ for s in range(1, N_SERIES + 1):
 
 df = pd.DataFrame(content)
 df.to_csv("content.csv", index=False)
+write_dim("content", df)
+
+with open_warehouse(["dim_content"]) as warehouse:
+    warehouse.write("dim_content", df)
 
 print(f"Generated {len(df):,} content rows")
@@ -1,15 +1,21 @@
 # generate_playback_sessions.py
 
 import random
+import numpy as np
 import pandas as pd
 from faker import Faker
 from datetime import datetime, timedelta
 
-from enums import (
-    DEVICE_TYPES,
-    OS_BY_DEVICE,
-    GEO_HIERARCHY,
+from columnar import open_dim
+from popularity import (
+    CONTENT_ZIPF_EXPONENT,
+    AliasSampler,
+    user_activity_weights,
+    zipf_weights,
 )
+from sinks import open_warehouse
+from traffic import TrafficModel
+from user_profiles import UserProfileStore
 
 # =========================================================
 # STABLE RANDOMNESS
@@ -17,6 +23,7 @@ from enums import (
 
 SEED = 51
 random.seed(SEED)
+rng = np.random.default_rng(SEED)
 fake = Faker()
 Faker.seed(SEED)
 
@@ -24,7 +31,6 @@ Faker.seed(SEED)
 # PARAMETERS
 # =========================================================
 
-N_USERS = 10000
 START_DATE = datetime(2026, 1, 1)
 DAYS = 30
 
@@ -34,23 +40,38 @@ AVG_SESSION_DURATION_MIN = 42
 CONTENT_TYPES = ["movie", "episode"]
 CONTENT_TYPE_WEIGHTS = [0.45, 0.55]
 
+# hour-of-day / day-of-week curves and holiday spikes, see traffic.py
+traffic = TrafficModel(START_DATE, DAYS)
+
 # =========================================================
-# HELPERS
+# USER PROFILES (device and geo come from the users stage)
 # =========================================================
 
+profiles = UserProfileStore()
+N_USERS = len(profiles)
+
+# power users: per-user multiplier on sessions per day, same as ad events
+USER_ACTIVITY = user_activity_weights(N_USERS, np.random.default_rng(SEED))
+
+# =========================================================
+# CONTENT CATALOG (memory-mapped content dimension)
+# =========================================================
 
-def sample_geo():
-    country = random.choice(list(GEO_HIERARCHY.keys()))
-    region = random.choice(list(GEO_HIERARCHY[country].keys()))
-    city = random.choice(GEO_HIERARCHY[country][region])
-    return country, region, city
+content = open_dim("content")
+CONTENT_IDS = content.column("content_id").tolist()
+CONTENT_TYPE_OF = content.decode("content_type", content["content_type"]).tolist()
 
+# movie / episode mix as configured, Zipf popularity within each type
+content_weights = np.zeros(len(content))
 
-def sample_device_os():
-    device = random.choice(DEVICE_TYPES)
-    os = random.choice(OS_BY_DEVICE[device])
-    return device, os
+for content_type, type_weight in zip(CONTENT_TYPES, CONTENT_TYPE_WEIGHTS):
+    type_code = content.labels("content_type").index(content_type)
+    idx = np.flatnonzero(content["content_type"] == type_code)
+    content_weights[idx] = type_weight * zipf_weights(
+        len(idx), CONTENT_ZIPF_EXPONENT, rng
+    )
 
+content_popularity = AliasSampler(content_weights)
 
 # =========================================================
 # GENERATE PLAYBACK SESSIONS
@@ -58,29 +79,36 @@ def sample_device_os():
 
 sessions = []
 
-for i in range(N_USERS):
-    user_id = f"user_{i}"
-    device_type, os = sample_device_os()
-    country, region, city = sample_geo()
-
-    for day in range(DAYS):
-        session_count = max(0, int(random.gauss(AVG_SESSIONS_PER_DAY, 0.6)))
-
-        for _ in range(session_count):
+# batches go to the warehouse (if configured) while generation continues
+with open_warehouse(["fact_playback_session"]) as warehouse:
+    for i in range(N_USERS):
+        user_id = f"user_{i}"
+        device_type, os, country, region, city = profiles.lookup(i)
+
+        # all days of the user at once: session counts, then starts and content
+        avg_sessions = (
+            AVG_SESSIONS_PER_DAY * USER_ACTIVITY[i] * traffic.day_weights(country)
+        )
+        session_counts = np.maximum(0, rng.normal(avg_sessions, 0.6).astype(np.int64))
+        session_days = np.repeat(np.arange(DAYS), session_counts)
+
+        start_times = traffic.session_starts(
+            country, region, session_days, rng
+        ).tolist()
+        watched = content_popularity.sample(len(session_days), rng).tolist()
+
+        for start_ts, content_idx in zip(start_times, watched):
             session_id = fake.uuid4()
-            start_ts = START_DATE + timedelta(days=day, minutes=random.randint(0, 1440))
 
             duration_min = max(5, int(random.gauss(AVG_SESSION_DURATION_MIN, 15)))
             end_ts = start_ts + timedelta(minutes=duration_min)
 
-            content_type = random.choices(CONTENT_TYPES, CONTENT_TYPE_WEIGHTS)[0]
-
             sessions.append(
                 {
                     "playback_session_id": session_id,
                     "user_id": user_id,
-                    "content_id": f"{content_type}_{random.randint(1, 500)}",
-                    "content_type": content_type,
+                    "content_id": CONTENT_IDS[content_idx],
+                    "content_type": CONTENT_TYPE_OF[content_idx],
                     "session_start_ts": start_ts,
                     "session_end_ts": end_ts,
                     "session_duration_minutes": duration_min,
@@ -94,6 +122,9 @@ for i in range(N_USERS):
                 }
             )
 
+        warehouse.stream("fact_playback_session", sessions)
+
+
 # =========================================================
 # WRITE OUTPUT
 # =========================================================
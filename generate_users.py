@@ -11,6 +11,10 @@ from enums import (
     GEO_HIERARCHY,
 )
 
+from sinks import open_warehouse
+from user_history import SCD_COLUMNS, iter_user_history
+from user_profiles import UserProfileStoreWriter, build_user_profile_store
+
 # =========================================================
 # 1. STABLE RANDOMNESS (must match ads generator)
 # =========================================================
@@ -34,6 +38,12 @@ SEGMENT_WEIGHTS = [0.55, 0.35, 0.10]
 AGE_BUCKETS = ["13-17", "18-24", "25-34", "35-44", "45-54", "55+"]
 AGE_WEIGHTS = [0.08, 0.22, 0.28, 0.20, 0.14, 0.08]
 
+# SCD Type 2 mode: users_history.csv gets one row per version (device,
+# segment upgrade and geo changes), users.csv the current version only.
+# Users are generated in vectorized batches, see user_history.py
+HISTORY_MODE = False
+HISTORY_BATCH_SIZE = 500_000
+
 # =========================================================
 # 3. HELPERS (shared logic with ads generator)
 # =========================================================
@@ -61,44 +71,107 @@ def random_date(start, end):
 # 4. USER GENERATION
 # =========================================================
 
-users = []
-
-for i in range(N_USERS):
-    user_id = f"user_{i}"
-
-    signup_date = random_date(START_DATE, END_DATE)
-    first_seen_date = signup_date
-    last_seen_date = signup_date + timedelta(days=random.randint(1, 180))
-
-    user_segment = random.choices(USER_SEGMENTS, weights=SEGMENT_WEIGHTS)[0]
-    age_bucket = random.choices(AGE_BUCKETS, weights=AGE_WEIGHTS)[0]
-
-    device_type, os = sample_device_os()
-    country, region, city = sample_geo()
-
-    users.append(
-        {
-            "user_id": user_id,
-            "signup_date": signup_date.date(),
-            "first_seen_date": first_seen_date.date(),
-            "last_seen_date": last_seen_date.date(),
-            "user_segment": user_segment,
-            "age_bucket": age_bucket,
-            "primary_device_type": device_type,
-            "primary_os": os,
-            "country": country,
-            "region": region,
-            "city": city,
-            "is_kids_profile": user_segment == "kids",
-            "updated_at": last_seen_date,
-        }
+
+def generate_user_snapshot():
+    """One row per user, no history."""
+    users = []
+
+    for i in range(N_USERS):
+        user_id = f"user_{i}"
+
+        signup_date = random_date(START_DATE, END_DATE)
+        first_seen_date = signup_date
+        last_seen_date = signup_date + timedelta(days=random.randint(1, 180))
+
+        user_segment = random.choices(USER_SEGMENTS, weights=SEGMENT_WEIGHTS)[0]
+        age_bucket = random.choices(AGE_BUCKETS, weights=AGE_WEIGHTS)[0]
+
+        device_type, os = sample_device_os()
+        country, region, city = sample_geo()
+
+        users.append(
+            {
+                "user_id": user_id,
+                "signup_date": signup_date.date(),
+                "first_seen_date": first_seen_date.date(),
+                "last_seen_date": last_seen_date.date(),
+                "user_segment": user_segment,
+                "age_bucket": age_bucket,
+                "primary_device_type": device_type,
+                "primary_os": os,
+                "country": country,
+                "region": region,
+                "city": city,
+                "is_kids_profile": user_segment == "kids",
+                "updated_at": last_seen_date,
+            }
+        )
+
+    return users
+
+
+# =========================================================
+# 5. SCD TYPE 2 HISTORY
+# =========================================================
+
+
+def write_user_history(warehouse, profile_store):
+    """
+    Stream versioned user rows to users_history.csv and the current
+    version of each user to users.csv, dim_user and the profile store,
+    one batch at a time.
+
+    Returns the number of versions.
+    """
+    n_versions = 0
+
+    batches = iter_user_history(
+        SEED,
+        N_USERS,
+        HISTORY_BATCH_SIZE,
+        start_date=START_DATE,
+        end_date=END_DATE,
+        segments=USER_SEGMENTS,
+        segment_weights=SEGMENT_WEIGHTS,
+        age_buckets=AGE_BUCKETS,
+        age_weights=AGE_WEIGHTS,
     )
 
-    # =========================================================
-# 5. WRITE OUTPUT
+    for batch_idx, history in enumerate(batches):
+        mode, header = ("w", True) if batch_idx == 0 else ("a", False)
+
+        history.to_csv("users_history.csv", mode=mode, header=header, index=False)
+
+        current = history[history["is_current"]].drop(columns=SCD_COLUMNS)
+        current.to_csv("users.csv", mode=mode, header=header, index=False)
+        warehouse.write("dim_user", current)
+
+        profile_store.write(current)
+
+        n_versions += len(history)
+
+    return n_versions
+
+
 # =========================================================
+# 6. WRITE OUTPUT
+# =========================================================
+
+# the memory-mapped users dimension (dims/users) is also the profile store
+# read by the session and ad event generators
+
+with open_warehouse(["dim_user"]) as warehouse:
+    if HISTORY_MODE:
+        # filled batch by batch, never holding all users in memory
+        profile_store = UserProfileStoreWriter(N_USERS)
+        n_versions = write_user_history(warehouse, profile_store)
+        profile_store.close()
 
-df = pd.DataFrame(users)
-df.to_csv("users.csv", index=False)
+        print(f"Generated {N_USERS:,} users with {n_versions:,} versions")
+    else:
+        df = pd.DataFrame(generate_user_snapshot())
+        df.to_csv("users.csv", index=False)
+        warehouse.write("dim_user", df)
+        build_user_profile_store(df)
 
-print(f"Generated {len(df):,} users")
+        print(f"Generated {len(df):,} users")
@@ -0,0 +1,95 @@
+# popularity.py
+
+###########################################################
+# Skewed popularity (Zipf / power law)
+# The k-th most popular item gets weight 1 / k^s, so a few
+# titles, campaigns and power users dominate traffic like
+# they do in production. Draws use a Walker alias table
+# built once: every draw in a batch is O(1).
+###########################################################
+
+import numpy as np
+
+# =========================================================
+# PARAMETERS (exponent 0 = uniform)
+# =========================================================
+
+CONTENT_ZIPF_EXPONENT = 1.0
+CAMPAIGN_ZIPF_EXPONENT = 0.8
+USER_ACTIVITY_EXPONENT = 0.6
+
+# cap on a single user's activity relative to the average user
+MAX_USER_ACTIVITY = 8.0
+
+# =========================================================
+# SAMPLERS
+# =========================================================
+
+
+def zipf_weights(n, exponent, rng=None):
+    """
+    Normalized Zipf weights for n items.
+
+    Item i gets rank i + 1, or a random rank when rng is given, so the most
+    popular items are not simply the first ones generated.
+    """
+    weights = np.arange(1, n + 1, dtype=float) ** -exponent
+    if rng is not None:
+        weights = weights[rng.permutation(n)]
+    return weights / weights.sum()
+
+
+class AliasSampler:
+    """
+    Walker / Vose alias table over item indices 0..n-1.
+
+    A draw picks a column uniformly, then either the column itself or its
+    alias with a precomputed probability.
+    """
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def sample(self, n, rng):
+        """Draw n item indices."""
+        column = rng.integers(0, len(self.prob), n)
+        return np.where(rng.random(n) < self.prob[column], column, self.alias[column])
+
+
+def user_activity_weights(n_users, rng, exponent=USER_ACTIVITY_EXPONENT):
+    """
+    Per-user multiplier on expected sessions: power-law over users in random
+    order, averaging 1 and capped at MAX_USER_ACTIVITY.
+
+    Capping and rescaling alternate: users at the cap are fixed, the rest are
+    scaled up to restore the mean, until no user exceeds the cap.
+    """
+    if MAX_USER_ACTIVITY < 1.0:
+        raise ValueError("MAX_USER_ACTIVITY must be at least 1 (the average)")
+
+    weights = zipf_weights(n_users, exponent, rng) * n_users
+    capped = np.zeros(n_users, dtype=bool)
+
+    while (weights > MAX_USER_ACTIVITY).any():
+        capped |= weights >= MAX_USER_ACTIVITY
+        weights[capped] = MAX_USER_ACTIVITY
+        free = ~capped
+        free_total = n_users - capped.sum() * MAX_USER_ACTIVITY
+        weights[free] *= free_total / weights[free].sum()
+
+    return weights
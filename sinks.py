@@ -0,0 +1,316 @@
+# sinks.py
+
+###########################################################
+# Warehouse sinks
+# Generators hand batches of rows to a SinkWriter; a
+# background thread bulk-inserts them into DuckDB or SQLite
+# (local stand-ins for Snowflake), so generation is not
+# blocked on database writes.
+###########################################################
+
+import queue
+import sqlite3
+import threading
+
+import pandas as pd
+
+# =========================================================
+# PARAMETERS
+# =========================================================
+
+# None disables the warehouse, otherwise "duckdb" or "sqlite"
+WAREHOUSE_SINK = None
+WAREHOUSE_PATHS = {
+    "duckdb": "warehouse.duckdb",
+    "sqlite": "warehouse.sqlite",
+}
+
+SINK_BATCH_ROWS = 50_000
+SINK_QUEUE_BATCHES = 8
+
+# =========================================================
+# TABLES (column -> warehouse type)
+# =========================================================
+
+TABLES = {
+    "dim_user": {
+        "user_id": "VARCHAR",
+        "signup_date": "DATE",
+        "first_seen_date": "DATE",
+        "last_seen_date": "DATE",
+        "user_segment": "VARCHAR",
+        "age_bucket": "VARCHAR",
+        "primary_device_type": "VARCHAR",
+        "primary_os": "VARCHAR",
+        "country": "VARCHAR",
+        "region": "VARCHAR",
+        "city": "VARCHAR",
+        "is_kids_profile": "BOOLEAN",
+        "updated_at": "TIMESTAMP",
+    },
+    "dim_content": {
+        "content_id": "VARCHAR",
+        "content_type": "VARCHAR",
+        "title": "VARCHAR",
+        "series_id": "VARCHAR",
+        "season_number": "INTEGER",
+        "episode_number": "INTEGER",
+        "genre": "VARCHAR",
+        "maturity_rating": "VARCHAR",
+        "duration_minutes": "INTEGER",
+        "release_year": "INTEGER",
+        "is_original": "BOOLEAN",
+        "created_at": "TIMESTAMP",
+    },
+    "dim_campaign": {
+        "campaign_id": "VARCHAR",
+        "advertiser_id": "VARCHAR",
+        "campaign_name": "VARCHAR",
+        "objective": "VARCHAR",
+        "bid_strategy": "VARCHAR",
+        "start_date": "DATE",
+        "end_date": "DATE",
+        "daily_budget_usd": "DOUBLE",
+        "total_budget_usd": "DOUBLE",
+        "created_at": "TIMESTAMP",
+        "updated_at": "TIMESTAMP",
+    },
+    "fact_playback_session": {
+        "playback_session_id": "VARCHAR",
+        "user_id": "VARCHAR",
+        "content_id": "VARCHAR",
+        "content_type": "VARCHAR",
+        "session_start_ts": "TIMESTAMP",
+        "session_end_ts": "TIMESTAMP",
+        "session_duration_minutes": "INTEGER",
+        "device_type": "VARCHAR",
+        "os": "VARCHAR",
+        "country": "VARCHAR",
+        "region": "VARCHAR",
+        "city": "VARCHAR",
+        "is_binge": "BOOLEAN",
+        "created_at": "TIMESTAMP",
+    },
+    "fact_ad_event": {
+        "event_id": "VARCHAR",
+        "session_id": "VARCHAR",
+        "user_id": "VARCHAR",
+        "ad_id": "VARCHAR",
+        "ad_format": "VARCHAR",
+        "creative_type": "VARCHAR",
+        "campaign_id": "VARCHAR",
+        "event_type": "VARCHAR",
+        "event_timestamp": "TIMESTAMP",
+        "device_type": "VARCHAR",
+        "os": "VARCHAR",
+        "country": "VARCHAR",
+        "region": "VARCHAR",
+        "city": "VARCHAR",
+        "surface": "VARCHAR",
+        "placement": "VARCHAR",
+        "position": "VARCHAR",
+        "revenue_usd": "DOUBLE",
+        "cost_usd": "DOUBLE",
+        "view_duration_ms": "INTEGER",
+        "is_billable": "BOOLEAN",
+        "impression_id": "VARCHAR",
+        "click_id": "VARCHAR",
+        "attribution_type": "VARCHAR",
+    },
+}
+
+SQLITE_TYPES = {
+    "VARCHAR": "TEXT",
+    "DATE": "TEXT",
+    "TIMESTAMP": "TEXT",
+    "INTEGER": "INTEGER",
+    "DOUBLE": "REAL",
+    "BOOLEAN": "INTEGER",
+}
+
+# =========================================================
+# SINKS
+# =========================================================
+
+
+def _conform(table, rows):
+    """DataFrame with the table's columns in order, dates as datetime64."""
+    df = pd.DataFrame(rows)[list(TABLES[table])]
+
+    for column, sql_type in TABLES[table].items():
+        if sql_type in ("DATE", "TIMESTAMP"):
+            df[column] = pd.to_datetime(df[column])
+
+    return df
+
+
+class DuckDBSink:
+    """Bulk inserts through DuckDB's zero-copy DataFrame scan."""
+
+    def __init__(self, path):
+        import duckdb
+
+        self.con = duckdb.connect(path)
+
+    def create_table(self, table):
+        columns = ", ".join(f"{c} {t}" for c, t in TABLES[table].items())
+        self.con.execute(f"DROP TABLE IF EXISTS {table}")
+        self.con.execute(f"CREATE TABLE {table} ({columns})")
+
+    def write(self, table, rows):
+        self.con.register("batch", _conform(table, rows))
+        self.con.execute(f"INSERT INTO {table} SELECT * FROM batch")
+        self.con.unregister("batch")
+
+    def close(self):
+        self.con.close()
+
+
+class SQLiteSink:
+    """Bulk inserts with executemany in one transaction per batch."""
+
+    def __init__(self, path):
+        self.con = sqlite3.connect(path)
+
+    def create_table(self, table):
+        columns = ", ".join(f"{c} {SQLITE_TYPES[t]}" for c, t in TABLES[table].items())
+        self.con.execute(f"DROP TABLE IF EXISTS {table}")
+        self.con.execute(f"CREATE TABLE {table} ({columns})")
+
+    def write(self, table, rows):
+        df = _conform(table, rows)
+
+        for column, sql_type in TABLES[table].items():
+            if sql_type == "DATE":
+                df[column] = df[column].dt.strftime("%Y-%m-%d")
+            elif sql_type == "TIMESTAMP":
+                df[column] = df[column].dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+        df = df.astype(object).where(df.notna(), None)
+        placeholders = ", ".join("?" * len(df.columns))
+
+        with self.con:
+            self.con.executemany(
+                f"INSERT INTO {table} VALUES ({placeholders})",
+                df.itertuples(index=False, name=None),
+            )
+
+    def close(self):
+        self.con.close()
+
+
+SINKS = {
+    "duckdb": DuckDBSink,
+    "sqlite": SQLiteSink,
+}
+
+# =========================================================
+# WRITERS
+# =========================================================
+
+
+class SinkWriter:
+    """
+    Producer/consumer queue in front of a sink.
+
+    write() enqueues a batch and returns; a worker thread owns the database
+    connection and inserts batches in order. The queue is bounded, so a
+    slow database applies back-pressure instead of buffering everything.
+    Errors in the worker are raised on the next write() or on close().
+    """
+
+    def __init__(self, kind, path, tables, max_batches=SINK_QUEUE_BATCHES):
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._error = None
+        self._streams = {}
+        self._thread = threading.Thread(
+            target=self._run, args=(kind, path, tables), daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, kind, path, tables):
+        sink = None
+        try:
+            sink = SINKS[kind](path)
+            for table in tables:
+                sink.create_table(table)
+
+            while (item := self._queue.get()) is not None:
+                sink.write(*item)
+        except Exception as e:
+            self._error = e
+            # keep draining so producers never block on a dead worker
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if sink is not None:
+                sink.close()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError("warehouse sink failed") from self._error
+
+    def write(self, table, rows):
+        """Queue rows (a DataFrame or list of dicts) for insertion into table."""
+        self._raise_error()
+        if len(rows):
+            self._queue.put((table, rows))
+
+    def stream(self, table, rows):
+        """
+        Queue the rows appended to the `rows` list since the last call once a
+        full batch has accumulated; close() writes the remainder.
+        """
+        offset = self._streams.get(table, (None, 0))[1]
+        if len(rows) - offset >= SINK_BATCH_ROWS:
+            self.write(table, rows[offset:])
+            offset = len(rows)
+        self._streams[table] = (rows, offset)
+
+    def close(self):
+        try:
+            for table, (rows, offset) in self._streams.items():
+                self.write(table, rows[offset:])
+        finally:
+            # always stop the worker, even if it failed and write() raised
+            self._streams.clear()
+            self._queue.put(None)
+            self._thread.join()
+
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NullWriter:
+    """Stand-in when no warehouse is configured."""
+
+    def write(self, table, rows):
+        pass
+
+    def stream(self, table, rows):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def open_warehouse(tables, kind=None, path=None):
+    """
+    Writer for the given tables, which are (re)created in the configured
+    warehouse. Returns a NullWriter when WAREHOUSE_SINK is None.
+    """
+    kind = kind or WAREHOUSE_SINK
+    if kind is None:
+        return NullWriter()
+    return SinkWriter(kind, path or WAREHOUSE_PATHS[kind], tables)
@@ -0,0 +1,145 @@
+# traffic.py
+
+###########################################################
+# Diurnal and weekday traffic shaping
+# Session starts follow per-country hour-of-day and
+# day-of-week curves, with optional holiday spikes, so the
+# hourly load shows realistic prime-time surges.
+# Minute-of-day draws go through a precomputed inverse-CDF
+# table: all of a user's session starts are one table lookup
+# per draw and datetime64 arithmetic, no per-row Python.
+###########################################################
+
+from datetime import date, timedelta
+
+import numpy as np
+
+# =========================================================
+# PARAMETERS
+# =========================================================
+
+# relative viewing per local hour 0..23: quiet overnight, prime time 20-22h
+HOURLY_WEIGHTS = [
+    0.35, 0.20, 0.12, 0.08, 0.06, 0.07,
+    0.15, 0.25, 0.30, 0.32, 0.35, 0.40,
+    0.50, 0.50, 0.50, 0.55, 0.65, 0.80,
+    1.00, 1.30, 1.60, 1.70, 1.40, 0.80,
+]  # fmt: skip
+
+# relative daily volume, Monday .. Sunday
+WEEKDAY_WEIGHTS = [0.90, 0.90, 0.95, 1.00, 1.15, 1.25, 1.15]
+
+# per-country overrides of the curves above, e.g. {"UK": [...24 weights]}
+COUNTRY_HOURLY_WEIGHTS = {}
+COUNTRY_WEEKDAY_WEIGHTS = {}
+
+# timestamps are written in UTC; curves apply to local time.
+# Standard time per (country, region) of enums.GEO_HIERARCHY
+UTC_OFFSET_HOURS = {
+    ("US", "CA"): -8,
+    ("US", "NY"): -5,
+    ("US", "WA"): -8,
+    ("CA", "ON"): -5,
+    ("CA", "BC"): -8,
+    ("UK", "ENG"): 0,
+    ("UK", "SCT"): 0,
+}
+
+# daily volume multipliers, {country: {date: multiplier}}
+HOLIDAYS = {
+    "US": {date(2026, 1, 1): 1.6, date(2026, 1, 19): 1.2},
+    "CA": {date(2026, 1, 1): 1.6},
+    "UK": {date(2026, 1, 1): 1.6},
+}
+
+INVERSE_CDF_SIZE = 1 << 16
+
+# =========================================================
+# TRAFFIC MODEL
+# =========================================================
+
+
+def minute_inverse_cdf(hourly_weights, size=INVERSE_CDF_SIZE):
+    """
+    Quantized inverse CDF of the minute of day.
+
+    Hourly weights are interpolated to a smooth per-minute curve; entry k
+    holds the minute at cumulative probability (k + 0.5) / size, so
+    table[uniform integer] is a draw from the curve.
+    """
+    minutes = np.arange(1440) + 0.5
+    hour_centers = (np.arange(24) + 0.5) * 60
+    weights = np.interp(minutes, hour_centers, hourly_weights, period=1440)
+
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+
+    quantiles = (np.arange(size) + 0.5) / size
+    return np.searchsorted(cdf, quantiles).astype(np.int16)
+
+
+class TrafficModel:
+    """
+    Session start times and daily volume per country over a date window.
+
+    day_weights() scales the expected sessions of each day (weekday curve
+    times holiday spike, averaging 1 over a regular week); session_starts()
+    places a batch of sessions within their days along the hour-of-day curve.
+    """
+
+    def __init__(self, start_date, days, holidays=HOLIDAYS):
+        self.start_date = start_date
+        self.days = days
+        self.holidays = holidays
+        self._minute_tables = {}
+        self._day_weights = {}
+        self._day_starts = {}
+
+    def _minute_table(self, country):
+        if country not in self._minute_tables:
+            hourly = COUNTRY_HOURLY_WEIGHTS.get(country, HOURLY_WEIGHTS)
+            self._minute_tables[country] = minute_inverse_cdf(hourly)
+        return self._minute_tables[country]
+
+    def day_weights(self, country):
+        """Multipliers on the average session count of every day in the window."""
+        if country not in self._day_weights:
+            weekday = np.asarray(
+                COUNTRY_WEEKDAY_WEIGHTS.get(country, WEEKDAY_WEIGHTS), dtype=float
+            )
+            weekday /= weekday.mean()
+            holidays = self.holidays.get(country, {})
+
+            dates = [
+                (self.start_date + timedelta(days=d)).date() for d in range(self.days)
+            ]
+            self._day_weights[country] = np.array(
+                [weekday[d.weekday()] * holidays.get(d, 1.0) for d in dates]
+            )
+        return self._day_weights[country]
+
+    def sample_minutes(self, country, n, rng):
+        """Draw n local minutes of day (0..1439) in bulk."""
+        table = self._minute_table(country)
+        return table[rng.integers(0, len(table), n)]
+
+    def _day_start(self, utc_offset_hours):
+        """UTC start (datetime64[s]) of every local day in the window."""
+        if utc_offset_hours not in self._day_starts:
+            self._day_starts[utc_offset_hours] = np.datetime64(
+                self.start_date, "s"
+            ) + (np.arange(self.days) * 86_400 - utc_offset_hours * 3600)
+        return self._day_starts[utc_offset_hours]
+
+    def session_starts(self, country, region, days, rng):
+        """
+        UTC session starts (datetime64[s]), one per entry of `days`: the
+        local day index of each session, e.g. np.repeat(day, counts).
+        The local time zone is the one of the user's region.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        minutes = self.sample_minutes(country, len(days), rng).astype(np.int64)
+        seconds = rng.integers(0, 60, len(days))
+
+        day_start = self._day_start(UTC_OFFSET_HOURS.get((country, region), 0))
+        return day_start[days] + minutes * 60 + seconds
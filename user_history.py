@@ -0,0 +1,274 @@
+# user_history.py
+
+###########################################################
+# SCD Type 2 history for the user dimension
+# Every user gets a version 1 row at signup, then device,
+# segment (ad_supported -> premium) and geo changes between
+# signup and last_seen_date, each as a new versioned row.
+# Users are generated in numpy batches: no per-user loop,
+# so 10M users x several versions stays tractable.
+###########################################################
+
+import numpy as np
+import pandas as pd
+
+from enums import (
+    DEVICE_TYPES,
+    OS_BY_DEVICE,
+    GEO_HIERARCHY,
+)
+
+# =========================================================
+# PARAMETERS
+# =========================================================
+
+CHANGE_TYPES = ["device", "segment", "geo"]
+CHANGE_TYPE_WEIGHTS = [0.5, 0.2, 0.3]
+
+AVG_CHANGES_PER_USER = 1.5
+MAX_VERSIONS_PER_USER = 6
+
+SCD_COLUMNS = ["version", "valid_from", "valid_to", "is_current"]
+
+# =========================================================
+# LOOKUP TABLES
+# =========================================================
+
+
+def _flatten(mapping):
+    """
+    Flatten a {parent: [children]} mapping into numpy lookup arrays.
+
+    Children are numbered globally in mapping order, so a child is picked
+    uniformly within its parent as start[parent] + floor(u * count[parent]).
+    """
+    children, child_parent, start, count = [], [], [], []
+
+    for parent_idx, parent in enumerate(mapping):
+        start.append(len(children))
+        count.append(len(mapping[parent]))
+        children.extend(mapping[parent])
+        child_parent.extend([parent_idx] * len(mapping[parent]))
+
+    return children, np.array(child_parent), np.array(start), np.array(count)
+
+
+def _labels(values):
+    """Unique labels in first-seen order plus the code of every value."""
+    labels = list(dict.fromkeys(values))
+    return labels, np.array([labels.index(v) for v in values])
+
+
+COUNTRIES = list(GEO_HIERARCHY.keys())
+
+OS_FLAT, _, OS_START, OS_COUNT = _flatten(OS_BY_DEVICE)
+# OS_BY_DEVICE is keyed in its own order, remap to DEVICE_TYPES codes
+_OS_BY_DEVICE_TYPE = [list(OS_BY_DEVICE).index(d) for d in DEVICE_TYPES]
+OS_START = OS_START[_OS_BY_DEVICE_TYPE]
+OS_COUNT = OS_COUNT[_OS_BY_DEVICE_TYPE]
+OS_LABELS, OS_LABEL_CODE = _labels(OS_FLAT)
+
+REGIONS, REGION_COUNTRY, REGION_START, REGION_COUNT = _flatten(
+    {country: list(regions) for country, regions in GEO_HIERARCHY.items()}
+)
+CITIES, CITY_REGION, CITY_START, CITY_COUNT = _flatten(
+    {
+        (country, region): cities
+        for country, regions in GEO_HIERARCHY.items()
+        for region, cities in regions.items()
+    }
+)
+REGION_LABELS, REGION_LABEL_CODE = _labels(REGIONS)
+CITY_LABELS, CITY_LABEL_CODE = _labels(CITIES)
+
+# =========================================================
+# HELPERS
+# =========================================================
+
+
+def _sample_child(rng, parent_codes, start, count):
+    offset = (rng.random(len(parent_codes)) * count[parent_codes]).astype(np.int64)
+    return start[parent_codes] + offset
+
+
+def _grouped_cumsum(values, group_first_row):
+    """Cumulative sum of `values` restarted at each user's first row."""
+    total = np.cumsum(values)
+    return total - (total[group_first_row] - values[group_first_row])
+
+
+def _forward_fill(values, is_set):
+    """Carry the last set value forward; each user's first row is always set."""
+    idx = np.where(is_set, np.arange(len(values)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return values[idx]
+
+
+def _categorical(codes, labels):
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+# =========================================================
+# HISTORY GENERATION
+# =========================================================
+
+
+def generate_user_history_batch(
+    rng,
+    first_user,
+    n_users,
+    start_date,
+    end_date,
+    segments,
+    segment_weights,
+    age_buckets,
+    age_weights,
+):
+    """
+    Generate SCD Type 2 rows for users first_user .. first_user + n_users - 1.
+
+    Returns a DataFrame with the users.csv columns plus version, valid_from,
+    valid_to (NaT for the open version) and is_current, ordered by user
+    then version.
+    """
+
+    # ----------------------------
+    # Version 1: attributes at signup
+    # ----------------------------
+    span_days = (end_date - start_date).days
+    signup = np.datetime64(start_date, "D") + rng.integers(0, span_days + 1, n_users)
+    last_seen = signup + rng.integers(1, 181, n_users)
+
+    segment = rng.choice(
+        len(segments), n_users, p=np.asarray(segment_weights) / sum(segment_weights)
+    )
+    age = rng.choice(
+        len(age_buckets), n_users, p=np.asarray(age_weights) / sum(age_weights)
+    )
+
+    device = rng.integers(0, len(DEVICE_TYPES), n_users)
+    os_flat = _sample_child(rng, device, OS_START, OS_COUNT)
+
+    country = rng.integers(0, len(COUNTRIES), n_users)
+    region = _sample_child(rng, country, REGION_START, REGION_COUNT)
+    city = _sample_child(rng, region, CITY_START, CITY_COUNT)
+
+    # ----------------------------
+    # Expand to one row per version
+    # ----------------------------
+    n_changes = np.minimum(
+        rng.poisson(AVG_CHANGES_PER_USER, n_users), MAX_VERSIONS_PER_USER - 1
+    )
+    versions = n_changes + 1
+    total = int(versions.sum())
+
+    row_user = np.repeat(np.arange(n_users), versions)
+    user_first_row = np.cumsum(versions) - versions
+    first_row = user_first_row[row_user]
+    version = np.arange(total) - first_row + 1
+    is_change = version > 1
+
+    # change times fall in (signup, last_seen]; version 1 stays first
+    span_seconds = (last_seen - signup).astype(np.int64)[row_user] * 86_400
+    offset_seconds = np.where(
+        is_change, ((1.0 - rng.random(total)) * span_seconds).astype(np.int64), 0
+    )
+    offset_seconds = offset_seconds[np.lexsort((offset_seconds, row_user))]
+
+    # ----------------------------
+    # Assign change types
+    # ----------------------------
+    device_code, segment_code, geo_code = range(len(CHANGE_TYPES))
+    change_type = rng.choice(
+        len(CHANGE_TYPES),
+        total,
+        p=np.asarray(CHANGE_TYPE_WEIGHTS) / sum(CHANGE_TYPE_WEIGHTS),
+    )
+    change_type[~is_change] = -1
+
+    # only the first segment change of an ad_supported user is an upgrade,
+    # every other segment change becomes a device change
+    ad_supported = segments.index("ad_supported")
+    premium = segments.index("premium")
+
+    segment_rows = np.flatnonzero(change_type == segment_code)
+    _, first_idx = np.unique(row_user[segment_rows], return_index=True)
+    upgrade_rows = segment_rows[first_idx]
+    upgrade_rows = upgrade_rows[segment[row_user[upgrade_rows]] == ad_supported]
+
+    is_upgrade = np.zeros(total, dtype=bool)
+    is_upgrade[upgrade_rows] = True
+    change_type[(change_type == segment_code) & ~is_upgrade] = device_code
+
+    # ----------------------------
+    # Carry attributes forward through the versions
+    # ----------------------------
+    upgraded = _grouped_cumsum(is_upgrade.astype(np.int64), first_row) > 0
+    segment_row = np.where(upgraded, premium, segment[row_user])
+
+    # a change always moves to a different device / city
+    is_device_change = change_type == device_code
+    device_shift = np.where(
+        is_device_change, rng.integers(1, len(DEVICE_TYPES), total), 0
+    )
+    device_row = (device[row_user] + _grouped_cumsum(device_shift, first_row)) % len(
+        DEVICE_TYPES
+    )
+    os_new = _sample_child(rng, device_row, OS_START, OS_COUNT)
+    os_row = _forward_fill(
+        np.where(is_change, os_new, os_flat[row_user]),
+        ~is_change | is_device_change,
+    )
+
+    city_shift = np.where(
+        change_type == geo_code, rng.integers(1, len(CITIES), total), 0
+    )
+    city_row = (city[row_user] + _grouped_cumsum(city_shift, first_row)) % len(CITIES)
+    region_row = CITY_REGION[city_row]
+    country_row = REGION_COUNTRY[region_row]
+
+    # ----------------------------
+    # Validity ranges
+    # ----------------------------
+    valid_from = signup[row_user].astype("datetime64[s]") + offset_seconds
+    is_current = np.append(row_user[1:] != row_user[:-1], True)
+    valid_to = np.append(valid_from[1:], np.datetime64("NaT", "s"))
+    valid_to[is_current] = np.datetime64("NaT", "s")
+
+    user_ids = np.char.add("user_", np.arange(first_user, first_user + n_users).astype(str))
+
+    return pd.DataFrame(
+        {
+            "user_id": user_ids[row_user],
+            "version": version,
+            "signup_date": signup[row_user],
+            "first_seen_date": signup[row_user],
+            "last_seen_date": last_seen[row_user],
+            "user_segment": _categorical(segment_row, segments),
+            "age_bucket": _categorical(age[row_user], age_buckets),
+            "primary_device_type": _categorical(device_row, DEVICE_TYPES),
+            "primary_os": _categorical(OS_LABEL_CODE[os_row], OS_LABELS),
+            "country": _categorical(country_row, COUNTRIES),
+            "region": _categorical(REGION_LABEL_CODE[region_row], REGION_LABELS),
+            "city": _categorical(CITY_LABEL_CODE[city_row], CITY_LABELS),
+            "is_kids_profile": segment_row == segments.index("kids"),
+            "valid_from": valid_from,
+            "valid_to": valid_to,
+            "is_current": is_current,
+            "updated_at": valid_from,
+        }
+    )
+
+
+def iter_user_history(seed, n_users, batch_size, **params):
+    """
+    Yield user history DataFrames in batches of batch_size users.
+
+    Each batch has its own generator seeded from (seed, batch index), so the
+    output is deterministic for a given batch_size.
+    """
+    for batch_idx, first_user in enumerate(range(0, n_users, batch_size)):
+        rng = np.random.default_rng([seed, batch_idx])
+        yield generate_user_history_batch(
+            rng, first_user, min(batch_size, n_users - first_user), **params
+        )
@@ -0,0 +1,97 @@
+# user_profiles.py
+
+###########################################################
+# Shared user profile store
+# Built once by generate_users.py; the playback session and
+# ad event generators look users up by integer user number
+# instead of re-sampling device and geo, so a user has the
+# same device, OS and location in every dataset.
+# The store is the memory-mapped users dimension (dims/users)
+# with rows ordered by user number.
+###########################################################
+
+import os
+
+import numpy as np
+
+from columnar import DIM_DIR, ColumnarTable, ColumnarWriter, write_table
+
+USER_PROFILE_DIR = os.path.join(DIM_DIR, "users")
+
+PROFILE_COLUMNS = [
+    "primary_device_type",
+    "primary_os",
+    "country",
+    "region",
+    "city",
+]
+
+
+def build_user_profile_store(users, directory=USER_PROFILE_DIR):
+    """
+    Write the users dimension (user_id = user_<n>) so that row n holds
+    user n.
+    """
+    user_num = users["user_id"].str.slice(len("user_")).astype(np.int64).to_numpy()
+    order = np.argsort(user_num, kind="stable")
+
+    if not np.array_equal(user_num[order], np.arange(len(users))):
+        raise ValueError("user_id values must be user_0 .. user_<N-1> without gaps")
+
+    # profile columns are always dictionary-encoded, whatever their cardinality
+    users = users.astype({column: "category" for column in PROFILE_COLUMNS})
+    write_table(directory, users.iloc[order].reset_index(drop=True))
+
+
+class UserProfileStoreWriter:
+    """
+    Incremental build_user_profile_store() for batches of users that arrive
+    in user-number order, e.g. from user_history.iter_user_history().
+
+    Rows go straight into preallocated memory-mapped columns, so only the
+    current batch is held in memory.
+    """
+
+    def __init__(self, n_users, directory=USER_PROFILE_DIR):
+        self._writer = ColumnarWriter(
+            directory,
+            n_users,
+            string_widths={"user_id": len(f"user_{max(n_users - 1, 0)}")},
+        )
+
+    def write(self, users):
+        first = self._writer.offset
+        user_num = users["user_id"].str.slice(len("user_")).astype(np.int64).to_numpy()
+
+        if not np.array_equal(user_num, np.arange(first, first + len(users))):
+            raise ValueError(f"batch must hold user_{first} .. in user-number order")
+
+        self._writer.write(
+            users.astype({column: "category" for column in PROFILE_COLUMNS})
+        )
+
+    def close(self):
+        self._writer.close()
+
+
+class UserProfileStore:
+    """
+    Memory-mapped user profiles indexed by integer user number.
+
+    Opening is cheap and the arrays are shared through the OS page cache,
+    so every worker process can open its own store.
+    """
+
+    def __init__(self, directory=USER_PROFILE_DIR):
+        self.table = ColumnarTable(directory)
+        self._codes = [self.table[column] for column in PROFILE_COLUMNS]
+        self._labels = [self.table.labels(column) for column in PROFILE_COLUMNS]
+
+    def __len__(self):
+        return len(self.table)
+
+    def lookup(self, user_num):
+        """Return (device_type, os, country, region, city) for one user."""
+        return tuple(
+            labels[codes[user_num]] for codes, labels in zip(self._codes, self._labels)
+        )